@@ -49,3 +49,49 @@ PATTERNS_TO_IGNORE = [
     re.compile(r'.*/ads\.txt$'),  # Ads.txt
     re.compile(r'.*/security\.txt$')  # Security.txt
 ]
+
+# Query parameters that listing APIs commonly use for pagination
+# Page-style parameters advance by one; offset-style ones advance by page size
+PAGE_PARAMS = ['page', 'pagenumber', 'page_number', 'pageno', 'pg', 'p']
+OFFSET_PARAMS = ['offset', 'start', 'skip', 'from']
+
+# Query parameters that set how many items a listing API page holds
+PAGE_SIZE_PARAMS = [
+    'limit', 'size', 'rows', 'pagesize', 'page_size', 'per_page', 'perpage',
+    'hitsperpage'
+]
+
+# Browser request headers not forwarded when replaying listing APIs
+# Content encodings are left to the HTTP client, which may not decode brotli,
+# and cookies are taken from the browser context at replay time
+REPLAY_EXCLUDED_HEADERS = [
+    'accept-encoding', 'connection', 'keep-alive', 'upgrade-insecure-requests',
+    'upgrade', 'host', 'content-length', 'transfer-encoding', 'te', 'trailer',
+    'proxy-connection', 'proxy-authorization', 'cookie'
+]
+
+# Static asset file extensions that are never product pages
+STATIC_ASSET_PATTERN = re.compile(
+    r'\.(jpe?g|png|gif|webp|avif|svg|ico|css|js|json|mp4|webm|woff2?|ttf|pdf)$'
+)
+
+# JSON keys whose values hold the product link in listing API responses
+PRODUCT_URL_KEYS = [
+    'url', 'href', 'link', 'producturl', 'product_url', 'pdpurl', 'seourl',
+    'canonicalurl'
+]
+
+# Path segment patterns used to collapse URLs into per-domain templates
+# Checked in order; the first match replaces the segment with its token
+# Two-word segments without digits (e.g. store-locator) are kept literally
+TEMPLATE_SEGMENT_PATTERNS = [
+    (re.compile(r'^\d+$'), '{num}'),  # Numeric IDs and page numbers
+    (re.compile(r'^[0-9a-f]{8}(-[0-9a-f]{4}){3}-[0-9a-f]{12}$'),
+     '{id}'),  # UUIDs
+    (re.compile(r'^(?=[a-z]*\d)(?=\d*[a-z])[a-z0-9]{5,}$'),
+     '{id}'),  # Mixed alphanumeric IDs (e.g. B00EXAMPLE)
+    (re.compile(r'^[a-z0-9]+([-_.][a-z0-9]+){2,}$'),
+     '{slug}'),  # Multi-word slugs
+    (re.compile(r'^(?=.*\d)[a-z0-9]+([-_.][a-z0-9]+)+$'),
+     '{slug}'),  # Slugs carrying a number (e.g. item-p123.html)
+]
@@ -1,22 +1,50 @@
 import asyncio
+import itertools
 import logging
-from typing import List
+from typing import Any, Dict, List, Optional
+import aiohttp
 from playwright.async_api import async_playwright
 
 from utils.url_utils import (normalize_domain, normalize_url, is_out_of_domain,
                              is_ignore_url, is_product_url)
+from utils.api_utils import (find_pagination_param, find_page_size,
+                             set_query_param, listing_endpoint_key,
+                             pagination_step, replay_headers,
+                             extract_product_urls_from_json)
+from core.template_model import TemplateModel
 
 
 class Crawler:
 
-  def __init__(self, domain: str, max_concurrent_tasks: int = 50) -> None:
+  def __init__(self,
+               domain: str,
+               max_concurrent_tasks: int = 50,
+               intercept_listing_apis: bool = False,
+               max_api_pages: int = 100,
+               learn_url_templates: bool = False,
+               template_model_path: Optional[str] = None,
+               template_min_samples: Optional[int] = None) -> None:
     self.domain: str = normalize_domain(domain)
     self.max_concurrent_tasks: int = max_concurrent_tasks
+    self.intercept_listing_apis: bool = intercept_listing_apis
+    self.max_api_pages: int = max_api_pages
     self.base_url: str = f"https://{domain}"
     self.product_urls: set[str] = set()
     self.context = None
-    self.crawl_queue: asyncio.Queue[str] = asyncio.Queue()
+    self.crawl_queue: asyncio.Queue = asyncio.Queue()
+    if learn_url_templates:
+      # Ordered by template yield, see enqueue_url
+      self.crawl_queue = asyncio.PriorityQueue()
+    self.queue_order = itertools.count()
     self.visited_urls: set = set()
+    self.http_session = None
+    # Per-domain template model, optionally persisted between runs
+    self.template_model_path: Optional[str] = template_model_path
+    self.template_model: Optional[TemplateModel] = None
+    if learn_url_templates:
+      self.template_model = TemplateModel.load(
+          template_model_path, min_samples=template_min_samples)
+    self.discovered_urls: set[str] = set()
 
   async def setup_browser(self) -> None:
     self.playwright = await async_playwright().start()
@@ -43,13 +71,171 @@ class Crawler:
       await self.browser.close()
     if self.playwright:
       await self.playwright.stop()
+    if self.http_session:
+      await self.http_session.close()
+      self.http_session = None
+
+  async def setup_http_session(self) -> None:
+    # One pooled session per crawler, shared by all listing API replays
+    self.http_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=self.max_concurrent_tasks),
+        timeout=aiohttp.ClientTimeout(total=30))
+
+  def add_product_urls(self, urls: List[str]) -> int:
+    new_urls: List[str] = [url for url in urls if url not in self.product_urls]
+    for url in new_urls:
+      logging.info(f"Product URL: {url}")
+      self.product_urls.add(url)
+    return len(new_urls)
+
+  async def record_listing_response(
+      self, response, endpoints: Dict[str, Dict[str, Any]]) -> int:
+    """
+      Record a JSON listing API response seen while rendering a page.
+
+      Only GET requests made through XHR/fetch that carry a pagination
+      parameter and return product URLs are kept, in the page's own
+      endpoints dict keyed by endpoint. Returns the number of new product
+      URLs the response added.
+      """
+    try:
+      request = response.request
+      if request.method != 'GET' or request.resource_type not in ('xhr',
+                                                                  'fetch'):
+        return 0
+      if 'json' not in response.headers.get('content-type', ''):
+        return 0
+      pagination = find_pagination_param(response.url)
+      if not pagination:
+        return 0
+      product_urls: List[str] = extract_product_urls_from_json(
+          await response.json(), self.base_url)
+    except Exception as e:
+      logging.debug(f"Skipping response {response.url}: {e}")
+      return 0
+    if not product_urls:
+      return 0
+
+    param, value = pagination
+    key: str = listing_endpoint_key(response.url, param)
+    endpoint: Dict[str, Any] = endpoints.setdefault(
+        key,
+        {
+            'url': response.url,
+            'param': param,
+            'values': [],
+            'products': 0,
+            # Matched product URLs only approximate the items on a page
+            'page_size': find_page_size(response.url) or len(product_urls),
+            'headers': replay_headers(request.headers)
+        })
+    endpoint['values'].append(value)
+    endpoint['products'] = max(endpoint['products'], len(product_urls))
+    logging.info(f"Listing API {key} paginated by '{param}'")
+    return self.add_product_urls(product_urls)
+
+  async def replay_listing_api(self, endpoint: Dict[str, Any]) -> int:
+    """
+      Page through a recorded listing API directly over HTTP.
+
+      Stops at the first page that fails, or that adds no new product URLs,
+      or after max_api_pages pages. Returns the number of new product URLs.
+      """
+    if not self.http_session:
+      await self.setup_http_session()
+    step: int = pagination_step(endpoint['param'], endpoint['values'],
+                                endpoint['page_size'])
+    value: int = max(endpoint['values'])
+    new_products: int = 0
+    # Session-gated APIs need the cookies the browser holds for the endpoint
+    headers: Dict[str, str] = dict(endpoint['headers'])
+    try:
+      cookies: List[Dict[str,
+                         Any]] = await self.context.cookies(endpoint['url'])
+    except Exception as e:
+      logging.warning(f"Replaying {endpoint['url']} without cookies: {e}")
+      cookies = []
+    if cookies:
+      headers['Cookie'] = '; '.join(f"{cookie['name']}={cookie['value']}"
+                                    for cookie in cookies)
+    for _ in range(self.max_api_pages):
+      value += step
+      page_url: str = set_query_param(endpoint['url'], endpoint['param'],
+                                      value)
+      try:
+        async with self.http_session.get(page_url,
+                                         headers=headers) as response:
+          if response.status != 200:
+            break
+          data = await response.json(content_type=None)
+      except Exception as e:
+        logging.error(f"Error replaying listing API {page_url}: {e}")
+        break
+      page_products: int = self.add_product_urls(
+          extract_product_urls_from_json(data, self.base_url))
+      if not page_products:
+        break
+      new_products += page_products
+    return new_products
+
+  async def replay_listing_apis(self, endpoints: Dict[str, Dict[str,
+                                                                Any]]) -> int:
+    replays = [
+        self.replay_listing_api(endpoint) for endpoint in endpoints.values()
+    ]
+    results = await asyncio.gather(*replays, return_exceptions=True)
+    new_products: int = 0
+    for result in results:
+      if isinstance(result, Exception):
+        logging.error(f"Error replaying listing API: {result}")
+      else:
+        new_products += result
+    return new_products
+
+  def covers_product_grid(self, endpoints: Dict[str, Dict[str, Any]],
+                          grid_products: set[str]) -> bool:
+    """
+      Check if a recorded listing API serves the page's product grid.
+
+      A single response has to match at least half as many product URLs as
+      the rendered grid shows, so a small recommendations widget does not
+      stop the page from scrolling to its real grid.
+      """
+    return any(endpoint['products'] * 2 >= len(grid_products)
+               for endpoint in endpoints.values())
+
+  async def wait_for_listing_responses(self, page,
+                                       pending: List[asyncio.Task]) -> None:
+    # Let in-flight listing responses arrive and be recorded before closing
+    try:
+      await page.wait_for_load_state("networkidle", timeout=10000)
+    except Exception as e:
+      logging.debug(f"Network did not settle: {e}")
+    await asyncio.gather(*pending, return_exceptions=True)
 
   async def extract_urls(self, url_to_visit: str) -> List[str]:
     logging.info(f"Extracting URLs from {url_to_visit}")
     extracted_urls: List[str] = []
+    new_products: int = 0
     try:
       page = await self.context.new_page()
 
+      # Listing API endpoints recorded from this page only
+      endpoints: Dict[str, Dict[str, Any]] = {}
+      pending: List[asyncio.Task] = []
+      grid_products: set[str] = set()
+
+      async def record_response(response) -> None:
+        # Products first seen in this page's own API responses count towards it
+        nonlocal new_products
+        new_products += await self.record_listing_response(response, endpoints)
+
+      def on_response(response) -> None:
+        pending.append(asyncio.ensure_future(record_response(response)))
+
+      if self.intercept_listing_apis:
+        page.on("response", on_response)
+
       # Start from the base URL
       await page.goto(url_to_visit, timeout=0)
 
@@ -61,12 +247,16 @@ class Crawler:
         for link in links:
           if is_product_url(link) and not is_out_of_domain(
               link, self.base_url):
-            logging.info(f"Product URL: {link}")
-            self.product_urls.add(link)
+            grid_products.add(link)
+            new_products += self.add_product_urls([link])
           elif link not in self.visited_urls and not is_out_of_domain(
               link, self.base_url) and not is_ignore_url(link):
             extracted_urls.append(link)
 
+        # A listing API serving the grid can be paged directly instead
+        if self.covers_product_grid(endpoints, grid_products):
+          break
+
         # Try to scroll for infinite scrolling
         previous_height: int = await page.evaluate("document.body.scrollHeight"
                                                    )
@@ -76,31 +266,64 @@ class Crawler:
         if new_height == previous_height:
           break
 
+      if self.intercept_listing_apis:
+        await self.wait_for_listing_responses(page, pending)
       await page.close()
+
+      if endpoints:
+        new_products += await self.replay_listing_apis(endpoints)
+
+      if self.template_model:
+        new_links: set[str] = set(extracted_urls) - self.discovered_urls
+        self.discovered_urls.update(new_links)
+        self.template_model.record(url_to_visit, new_products, len(new_links))
     except Exception as e:
       logging.error(f"Error crawling {self.domain}: {e}")
 
     return extracted_urls
 
+  def should_skip_template(self, url: str) -> bool:
+    # The base URL is always rendered so a crawl can never be skipped entirely
+    if not self.template_model or url == normalize_url(self.base_url):
+      return False
+    if self.template_model.should_skip(url):
+      logging.info(f"Skipping unproductive template URL: {url}")
+      return True
+    return False
+
+  def save_template_model(self) -> None:
+    if self.template_model and self.template_model_path:
+      self.template_model.save(self.template_model_path)
+
+  async def enqueue_url(self, url: str) -> None:
+    if self.template_model:
+      # Productive and unexplored templates first, FIFO within equal scores
+      await self.crawl_queue.put(
+          (-self.template_model.score(url), next(self.queue_order), url))
+    else:
+      await self.crawl_queue.put(url)
+
   async def dequeue_and_visit(self):
-    url_to_goto: str = await self.crawl_queue.get()
+    item = await self.crawl_queue.get()
+    url_to_goto: str = item[-1] if self.template_model else item
     url_to_goto = normalize_url(url_to_goto)
     if url_to_goto in self.visited_urls or is_out_of_domain(
-        url_to_goto, self.base_url) or is_ignore_url(url_to_goto):
+        url_to_goto, self.base_url) or is_ignore_url(
+            url_to_goto) or self.should_skip_template(url_to_goto):
       self.crawl_queue.task_done()
       return
     extracted_urls: List[str] = await self.extract_urls(
         url_to_visit=url_to_goto)
     self.visited_urls.add(url_to_goto)
     for extracted_url in extracted_urls:
-      await self.crawl_queue.put(extracted_url)
+      await self.enqueue_url(extracted_url)
     self.crawl_queue.task_done()
 
   async def crawl(self) -> List[str]:
     if not self.context:
       await self.setup_browser()
 
-    await self.crawl_queue.put(self.base_url)
+    await self.enqueue_url(self.base_url)
 
     while not self.crawl_queue.empty():
       tasks = [
@@ -109,4 +332,5 @@ class Crawler:
       ]
       await asyncio.gather(*tasks)
 
+    self.save_template_model()
     return list(self.product_urls)
@@ -1,10 +1,13 @@
 import json
 import logging
-from typing import List, Dict
+import os
+import re
+from typing import List, Dict, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import asyncio
 
 from core.crawler import Crawler
+from utils.url_utils import normalize_domain
 
 
 class CrawlDirector:
@@ -13,6 +16,42 @@ class CrawlDirector:
     It manages concurrent crawling operations and handles result aggregation.
     """
 
+  def __init__(self,
+               intercept_listing_apis: bool = False,
+               template_model_dir: Optional[str] = None,
+               template_min_samples: Optional[int] = None) -> None:
+    """
+        Args:
+            intercept_listing_apis: Record the JSON listing APIs each rendered
+                page calls and page through them directly over HTTP instead
+                of scrolling
+            template_model_dir: Directory holding one learned URL template
+                model per domain; enables template learning when set
+            template_min_samples: Visits of an unproductive URL template
+                before its pages are skipped; defaults to the saved model's
+                setting, or 5
+        """
+    self.intercept_listing_apis: bool = intercept_listing_apis
+    self.template_model_dir: Optional[str] = template_model_dir
+    self.template_min_samples: Optional[int] = template_min_samples
+
+  def template_model_path(self, domain: str) -> Optional[str]:
+    """
+        Build the path of the template model file for a domain.
+
+        Args:
+            domain: Domain being crawled (e.g., "www2.hm.com/en_in")
+
+        Returns:
+            Path to the domain's JSON model, or None if learning is disabled
+        """
+    if not self.template_model_dir:
+      return None
+    # www.example.com and example.com share one model
+    filename: str = re.sub(r'[^a-z0-9.]+', '_',
+                           normalize_domain(domain)).strip('_')
+    return os.path.join(self.template_model_dir, f"{filename}.json")
+
   def execute_crawlers(self, domains: List[str]) -> Dict[str, List[str]]:
     """
         Execute crawlers for multiple domains concurrently.
@@ -42,7 +81,12 @@ class CrawlDirector:
                 List of discovered product URLs for the domain
             """
       logging.info(f"Executing crawler for {domain}")
-      crawler: Crawler = Crawler(domain)
+      crawler: Crawler = Crawler(
+          domain,
+          intercept_listing_apis=self.intercept_listing_apis,
+          learn_url_templates=self.template_model_dir is not None,
+          template_model_path=self.template_model_path(domain),
+          template_min_samples=self.template_min_samples)
       try:
         urls: List[str] = await crawler.crawl()
         return urls
@@ -0,0 +1,166 @@
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+from utils.url_utils import url_template
+
+
+class TemplateModel:
+  """
+    Per-domain model of URL templates and how productive rendering them is.
+
+    Each visited page is recorded against its URL template together with the
+    number of new product URLs and new links it produced. Templates that
+    stay unproductive after min_samples visits are skipped, apart from an
+    occasional re-sample that lets them recover.
+    """
+
+  def __init__(self,
+               min_samples: int = 5,
+               min_new_links: float = 1.0,
+               resample_every: int = 20) -> None:
+    """
+        Args:
+            min_samples: Visits needed before a template can be skipped
+            min_new_links: Average new links per visit below which a template
+                without product yield counts as unproductive
+            resample_every: Render one in this many URLs of a skipped
+                template so it is sampled again
+        """
+    self.min_samples: int = min_samples
+    self.min_new_links: float = min_new_links
+    self.resample_every: int = resample_every
+    self.templates: Dict[str, Dict[str, int]] = {}
+    self.skips: Dict[str, int] = {}
+
+  def record(self, url: str, products: int, new_links: int) -> None:
+    stats: Dict[str, int] = self.templates.setdefault(url_template(url), {
+        'samples': 0,
+        'products': 0,
+        'new_links': 0
+    })
+    stats['samples'] += 1
+    stats['products'] += products
+    stats['new_links'] += new_links
+
+  def is_unproductive(self, template: str) -> bool:
+    stats = self.templates.get(template)
+    if not stats or stats['samples'] < self.min_samples:
+      return False
+    return (stats['products'] == 0
+            and stats['new_links'] / stats['samples'] < self.min_new_links)
+
+  def should_skip(self, url: str) -> bool:
+    template: str = url_template(url)
+    if not self.is_unproductive(template):
+      return False
+    self.skips[template] = self.skips.get(template, 0) + 1
+    return self.skips[template] % self.resample_every != 0
+
+  def score(self, url: str) -> float:
+    """
+        Average yield per visit of the URL's template, used to order the queue.
+
+        Templates not seen yet score highest so they get sampled early.
+        """
+    stats = self.templates.get(url_template(url))
+    if not stats or not stats['samples']:
+      return float('inf')
+    return (stats['products'] + stats['new_links']) / stats['samples']
+
+  def export(self) -> List[Dict[str, Any]]:
+    """
+        Export the learned templates for review.
+
+        Returns:
+            One entry per template with its counters and a status of
+            "learning", "productive" or "skipped", sorted by template
+        """
+    rows: List[Dict[str, Any]] = []
+    for template, stats in sorted(self.templates.items()):
+      if self.is_unproductive(template):
+        status = 'skipped'
+      elif stats['samples'] < self.min_samples:
+        status = 'learning'
+      else:
+        status = 'productive'
+      rows.append({'template': template, **stats, 'status': status})
+    return rows
+
+  def save(self, path: str) -> None:
+    directory: str = os.path.dirname(path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    # Write next to the target and swap it in so an interrupted save never
+    # leaves a truncated model behind
+    tmp_path: str = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+      json.dump(
+          {
+              'min_samples': self.min_samples,
+              'min_new_links': self.min_new_links,
+              'templates': self.export()
+          },
+          f,
+          indent=2)
+    os.replace(tmp_path, path)
+
+  @classmethod
+  def load(cls,
+           path: Optional[str],
+           min_samples: Optional[int] = None,
+           min_new_links: Optional[float] = None,
+           decay: float = 0.5) -> 'TemplateModel':
+    """
+        Load a model saved by a previous run, or start an empty one.
+
+        Counters from the file are scaled down by decay, so evidence from
+        older runs fades and a template skipped after a bad run has to
+        prove itself unproductive again. Settings saved in the file are used
+        unless given explicitly.
+
+        Args:
+            path: JSON file written by save(), or None for an unsaved model
+            min_samples: Visits needed before a template can be skipped
+            min_new_links: Average new links per visit below which a template
+                without product yield counts as unproductive
+            decay: Factor applied to the loaded counters
+
+        Returns:
+            The loaded model, or a new model if the file does not exist or
+            cannot be read
+        """
+    settings: Dict[str, Any] = {
+        name: value
+        for name, value in (('min_samples', min_samples), ('min_new_links',
+                                                           min_new_links))
+        if value is not None
+    }
+    if not path or not os.path.exists(path):
+      return cls(**settings)
+    templates: Dict[str, Dict[str, int]] = {}
+    try:
+      with open(path, 'r') as f:
+        data: Dict[str, Any] = json.load(f)
+      saved: Dict[str, Any] = {
+          name: data[name]
+          for name in ('min_samples', 'min_new_links') if name in data
+      }
+      for row in data.get('templates', []):
+        samples: int = int(row['samples'] * decay)
+        if not samples:
+          continue
+        templates[row['template']] = {
+            'samples': samples,
+            'products': math.ceil(row['products'] * decay),
+            'new_links': int(row['new_links'] * decay)
+        }
+    except (json.JSONDecodeError, KeyError, TypeError, AttributeError,
+            OSError) as e:
+      logging.warning(f"Ignoring unreadable template model {path}: {e}")
+      return cls(**settings)
+    model = cls(**{**saved, **settings})
+    model.templates = templates
+    return model
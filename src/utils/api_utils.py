@@ -0,0 +1,199 @@
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import (urlparse, parse_qsl, urlencode, urlunparse, urljoin,
+                          quote_plus, unquote_plus)
+
+from config.patterns import (PAGE_PARAMS, OFFSET_PARAMS, PAGE_SIZE_PARAMS,
+                             PRODUCT_URL_KEYS, REPLAY_EXCLUDED_HEADERS,
+                             STATIC_ASSET_PATTERN)
+from utils.url_utils import is_out_of_domain, is_product_url, is_ignore_url
+
+
+def find_pagination_param(url: str) -> Optional[Tuple[str, int]]:
+  """
+    Find the query parameter a listing API uses for pagination.
+
+    Args:
+        url: Listing API request URL
+
+    Returns:
+        Tuple of (parameter name, current integer value), or None if the URL
+        carries no recognised pagination parameter
+
+    Examples:
+        >>> find_pagination_param("https://example.com/api/list?page=2&size=24")
+        ('page', 2)
+        >>> find_pagination_param("https://example.com/api/list?q=shoes")
+    """
+  params = parse_qsl(urlparse(url).query, keep_blank_values=True)
+  for candidates in (PAGE_PARAMS, OFFSET_PARAMS):
+    for name, value in params:
+      if name.lower() in candidates and value.isdigit():
+        return name, int(value)
+  return None
+
+
+def find_page_size(url: str) -> Optional[int]:
+  """
+    Find the number of items per page requested from a listing API.
+
+    Args:
+        url: Listing API request URL
+
+    Returns:
+        Value of the first limit/size/rows-style parameter, or None if the
+        URL carries none
+
+    Examples:
+        >>> find_page_size("https://example.com/api/list?offset=0&limit=48")
+        48
+        >>> find_page_size("https://example.com/api/list?offset=0")
+    """
+  for name, value in parse_qsl(urlparse(url).query, keep_blank_values=True):
+    if name.lower() in PAGE_SIZE_PARAMS and value.isdigit():
+      return int(value)
+  return None
+
+
+def set_query_param(url: str, name: str, value: Any) -> str:
+  """
+    Set a query parameter on a URL, leaving the rest of the query as sent.
+
+    Only the value of the given parameter is rewritten, so signed or strictly
+    parsed URLs keep their exact encoding.
+
+    Args:
+        url: URL to modify
+        name: Query parameter name
+        value: New value for the parameter
+
+    Returns:
+        URL with the parameter set to the given value
+
+    Examples:
+        >>> set_query_param("https://example.com/api?page=1&size=24", "page", 2)
+        'https://example.com/api?page=2&size=24'
+    """
+  parsed = urlparse(url)
+  parts = parsed.query.split('&') if parsed.query else []
+  replaced = False
+  for i, part in enumerate(parts):
+    raw_name = part.split('=', 1)[0]
+    if unquote_plus(raw_name) == name:
+      parts[i] = f"{raw_name}={quote_plus(str(value))}"
+      replaced = True
+  if not replaced:
+    parts.append(f"{quote_plus(name)}={quote_plus(str(value))}")
+  return urlunparse(parsed._replace(query='&'.join(parts)))
+
+
+def listing_endpoint_key(url: str, param: str) -> str:
+  """
+    Build a key identifying a listing endpoint independently of its page.
+
+    Args:
+        url: Listing API request URL
+        param: Name of the pagination parameter to drop
+
+    Returns:
+        URL without the pagination parameter and with sorted query parameters
+
+    Examples:
+        >>> listing_endpoint_key("https://example.com/api?size=24&page=3", "page")
+        'https://example.com/api?size=24'
+    """
+  parsed = urlparse(url)
+  params = sorted(
+      (key, val)
+      for key, val in parse_qsl(parsed.query, keep_blank_values=True)
+      if key != param)
+  return urlunparse(parsed._replace(query=urlencode(params), fragment=''))
+
+
+def pagination_step(param: str, values: List[int], page_size: int) -> int:
+  """
+    Work out how far the pagination parameter advances between pages.
+
+    Args:
+        param: Name of the pagination parameter
+        values: Parameter values observed in recorded requests
+        page_size: Number of items per page
+
+    Returns:
+        Smallest observed gap between values, or 1 for page-style and the
+        page size for offset-style parameters when only one value was seen
+
+    Examples:
+        >>> pagination_step("offset", [0, 48, 96], 40)
+        48
+        >>> pagination_step("page", [1], 24)
+        1
+    """
+  ordered = sorted(set(values))
+  gaps = [b - a for a, b in zip(ordered, ordered[1:])]
+  if gaps:
+    return min(gaps)
+  if param.lower() in OFFSET_PARAMS:
+    return max(page_size, 1)
+  return 1
+
+
+def replay_headers(headers: Dict[str, str]) -> Dict[str, str]:
+  """
+    Select the browser request headers worth sending on a listing API replay.
+
+    Args:
+        headers: Headers of the recorded browser request
+
+    Returns:
+        Headers without pseudo-headers, hop-by-hop headers, cookies and
+        Accept-Encoding
+
+    Examples:
+        >>> replay_headers({"Accept": "*/*", "Connection": "keep-alive"})
+        {'Accept': '*/*'}
+    """
+  return {
+      name: value
+      for name, value in headers.items() if not name.startswith(':')
+      and name.lower() not in REPLAY_EXCLUDED_HEADERS
+  }
+
+
+def extract_product_urls_from_json(data: Any, base_url: str) -> List[str]:
+  """
+    Collect in-domain product URLs from a listing API JSON payload.
+
+    Only strings held under a known link key are considered, so image and API
+    paths elsewhere in the payload are not mistaken for products. Each one
+    is resolved against the base URL and kept if it matches the product
+    patterns and is neither a static asset nor an ignored URL.
+
+    Args:
+        data: Decoded JSON payload
+        base_url: Base URL of the crawled domain
+
+    Returns:
+        Product URLs in the order they appear in the payload, without duplicates
+
+    Examples:
+        >>> extract_product_urls_from_json(
+        ...     {"items": [{"url": "/product/1"}]}, "https://example.com")
+        ['https://example.com/product/1']
+    """
+  product_urls: List[str] = []
+  stack: List[Tuple[Optional[str], Any]] = [(None, data)]
+  while stack:
+    key, value = stack.pop()
+    if isinstance(value, dict):
+      stack.extend(reversed(list(value.items())))
+    elif isinstance(value, list):
+      stack.extend((key, item) for item in reversed(value))
+    elif isinstance(value, str):
+      if key is None or key.lower() not in PRODUCT_URL_KEYS:
+        continue
+      url = urljoin(f"{base_url}/", value.strip())
+      if (url not in product_urls and is_product_url(url)
+          and not is_out_of_domain(url, base_url) and not is_ignore_url(url)
+          and not STATIC_ASSET_PATTERN.search(urlparse(url).path.lower())):
+        product_urls.append(url)
+  return product_urls
@@ -1,7 +1,8 @@
 import re
-from urllib.parse import urlparse
+from urllib.parse import urlparse, parse_qsl
 
-from config.patterns import PRODUCT_PATTERNS, PATTERNS_TO_IGNORE
+from config.patterns import (PRODUCT_PATTERNS, PATTERNS_TO_IGNORE,
+                             TEMPLATE_SEGMENT_PATTERNS)
 
 
 def normalize_domain(domain: str) -> str:
@@ -105,3 +106,41 @@ def is_ignore_url(url: str) -> bool:
         False
     """
   return any(re.search(pattern, url) for pattern in PATTERNS_TO_IGNORE)
+
+
+def url_template(url: str) -> str:
+  """
+    Collapse a URL into a template of its path and query parameter names.
+
+    Path segments that look like numbers, IDs or slugs are replaced with
+    {num}, {id} and {slug} tokens; query values are dropped.
+
+    Args:
+        url: URL to collapse
+
+    Returns:
+        Template shared by URLs of the same page type
+
+    Examples:
+        >>> url_template("https://example.com/shoes/nike-air-max-90/12345")
+        '/shoes/{slug}/{num}'
+        >>> url_template("https://example.com/search?sort=asc&q=shoes")
+        '/search?q&sort'
+    """
+  parsed = urlparse(url.lower().strip())
+  segments = []
+  for segment in parsed.path.split('/'):
+    if not segment:
+      continue
+    for pattern, token in TEMPLATE_SEGMENT_PATTERNS:
+      if pattern.match(segment):
+        segment = token
+        break
+    segments.append(segment)
+  template = '/' + '/'.join(segments)
+  params = sorted(
+      {name
+       for name, _ in parse_qsl(parsed.query, keep_blank_values=True)})
+  if params:
+    template += '?' + '&'.join(params)
+  return template
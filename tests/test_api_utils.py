@@ -0,0 +1,130 @@
+import pytest
+from src.utils.api_utils import (find_pagination_param, find_page_size,
+                                 set_query_param, listing_endpoint_key,
+                                 pagination_step, replay_headers,
+                                 extract_product_urls_from_json)
+
+
+@pytest.mark.parametrize("url,expected", [
+    ("https://example.com/api/list?page=2&size=24", ("page", 2)),
+    ("https://example.com/api/list?size=24&pageNumber=0", ("pageNumber", 0)),
+    ("https://example.com/api/list?offset=48&limit=24", ("offset", 48)),
+    ("https://example.com/api/list?start=0&p=3", ("p", 3)),
+    ("https://example.com/api/list?page=next", None),
+    ("https://example.com/api/list?q=shoes", None),
+    ("https://example.com/api/list", None),
+])
+def test_find_pagination_param(url, expected):
+  assert find_pagination_param(url) == expected
+
+
+@pytest.mark.parametrize("url,expected", [
+    ("https://example.com/api/list?offset=0&limit=48", 48),
+    ("https://example.com/api/list?start=0&rows=24", 24),
+    ("https://example.com/api/list?page=1&pageSize=60", 60),
+    ("https://example.com/api/list?offset=0&limit=all", None),
+    ("https://example.com/api/list?offset=0", None),
+])
+def test_find_page_size(url, expected):
+  assert find_page_size(url) == expected
+
+
+@pytest.mark.parametrize("url,name,value,expected", [
+    ("https://example.com/api?page=1&size=24", "page", 2,
+     "https://example.com/api?page=2&size=24"),
+    ("https://example.com/api?size=24", "offset", 24,
+     "https://example.com/api?size=24&offset=24"),
+    ("https://example.com/api", "page", 2, "https://example.com/api?page=2"),
+    ("https://example.com/api?fq=a,b&q=red%20shoes&page=1&sig=x%2By", "page",
+     2, "https://example.com/api?fq=a,b&q=red%20shoes&page=2&sig=x%2By"),
+    ("https://example.com/api?q=red+shoes&flag&page=1", "page", 2,
+     "https://example.com/api?q=red+shoes&flag&page=2"),
+])
+def test_set_query_param(url, name, value, expected):
+  assert set_query_param(url, name, value) == expected
+
+
+def test_listing_endpoint_key_ignores_page_and_param_order():
+  assert listing_endpoint_key(
+      "https://example.com/api?size=24&page=3&cat=men",
+      "page") == listing_endpoint_key(
+          "https://example.com/api?cat=men&page=1&size=24", "page")
+
+
+@pytest.mark.parametrize("param,values,page_size,expected", [
+    ("offset", [0, 48, 96], 40, 48),
+    ("page", [1, 2], 24, 1),
+    ("page", [1], 24, 1),
+    ("offset", [0], 24, 24),
+    ("start", [0], 0, 1),
+])
+def test_pagination_step(param, values, page_size, expected):
+  assert pagination_step(param, values, page_size) == expected
+
+
+def test_replay_headers():
+  headers = {
+      ":authority": "example.com",
+      "Accept": "application/json",
+      "accept-encoding": "gzip, deflate, br",
+      "Connection": "keep-alive",
+      "Upgrade-Insecure-Requests": "1",
+      "cookie": "session=abc",
+      "x-api-key": "key"
+  }
+  assert replay_headers(headers) == {
+      "Accept": "application/json",
+      "x-api-key": "key"
+  }
+
+
+def test_extract_product_urls_from_json():
+  products = [
+      {
+          "id": 1,
+          "url": "/product/1"
+      },
+      {
+          "id": 2,
+          "seoUrl": "product/2"
+      },
+      {
+          "id": 3,
+          "link": ["https://www.example.com/p/3"]
+      },
+      {
+          "id": 4,
+          "url": "/product/1"
+      },
+  ]
+  banners = [
+      {
+          "href": "/category/sale"
+      },
+      {
+          "href": "https://otherdomain.com/product/5"
+      },
+  ]
+  data = {"name": "listing", "products": products, "banners": banners}
+  assert extract_product_urls_from_json(data, "https://example.com") == [
+      "https://example.com/product/1", "https://example.com/product/2",
+      "https://www.example.com/p/3"
+  ]
+
+
+def test_extract_product_urls_from_json_skips_assets_and_api_paths():
+  data = {
+      "url": "/product/1",
+      "image": "/product/images/1.jpg",
+      "thumb": "https://example.com/media/p/1.webp",
+      "api": "/api/product/1/reviews",
+      "href": "/product/images/2.png",
+      "link": "https://example.com/p/2/thumbnail.JPEG"
+  }
+  assert extract_product_urls_from_json(
+      data, "https://example.com") == ["https://example.com/product/1"]
+
+
+@pytest.mark.parametrize("data", [None, [], {}, "text", 42])
+def test_extract_product_urls_from_json_without_products(data):
+  assert extract_product_urls_from_json(data, "https://example.com") == []
@@ -1,6 +1,6 @@
 import pytest
 import asyncio
-from unittest.mock import Mock, patch, AsyncMock
+from unittest.mock import Mock, MagicMock, patch, AsyncMock
 from src.core.crawler import Crawler
 from src.utils.url_utils import normalize_domain
 
@@ -88,3 +88,416 @@ async def test_dequeue_and_visit_with_invalid_urls(crawler):
     await crawler.dequeue_and_visit()
     assert "https://example.com/robots.txt" not in crawler.visited_urls
     assert not mock_extract.called
+
+
+def mock_listing_response(url, payload, method="GET", resource_type="xhr"):
+  response = MagicMock()
+  response.url = url
+  response.headers = {"content-type": "application/json; charset=utf-8"}
+  response.json = AsyncMock(return_value=payload)
+  response.request.method = method
+  response.request.resource_type = resource_type
+  response.request.headers = {
+      "accept": "application/json",
+      "accept-encoding": "gzip, deflate, br"
+  }
+  return response
+
+
+@pytest.mark.asyncio
+async def test_record_listing_response():
+  crawler = Crawler("example.com", intercept_listing_apis=True)
+  endpoints = {}
+  new_products = await crawler.record_listing_response(
+      mock_listing_response("https://example.com/api/list?page=1",
+                            {"items": [{
+                                "url": "/product/1"
+                            }]}), endpoints)
+
+  assert new_products == 1
+  assert "https://example.com/product/1" in crawler.product_urls
+  assert len(endpoints) == 1
+  endpoint = next(iter(endpoints.values()))
+  assert endpoint["param"] == "page"
+  assert endpoint["values"] == [1]
+  assert endpoint["page_size"] == 1
+  assert endpoint["headers"] == {"accept": "application/json"}
+
+
+@pytest.mark.asyncio
+async def test_record_listing_response_skips_non_listing_requests():
+  crawler = Crawler("example.com", intercept_listing_apis=True)
+  payload = {"items": [{"url": "/product/1"}]}
+  endpoints = {}
+  await crawler.record_listing_response(
+      mock_listing_response("https://example.com/api/list", payload),
+      endpoints)
+  await crawler.record_listing_response(
+      mock_listing_response("https://example.com/api/list?page=1",
+                            payload,
+                            method="POST"), endpoints)
+  await crawler.record_listing_response(
+      mock_listing_response("https://example.com/api/list?page=1",
+                            payload,
+                            resource_type="document"), endpoints)
+
+  assert not endpoints
+
+
+@pytest.mark.asyncio
+async def test_record_listing_response_reads_page_size_from_request():
+  crawler = Crawler("example.com", intercept_listing_apis=True)
+  endpoints = {}
+  await crawler.record_listing_response(
+      mock_listing_response("https://example.com/api/list?offset=0&limit=48",
+                            {"items": [{
+                                "url": "/product/1"
+                            }]}), endpoints)
+
+  assert next(iter(endpoints.values()))["page_size"] == 48
+
+
+@pytest.mark.asyncio
+async def test_replay_listing_apis():
+  crawler = Crawler("example.com", intercept_listing_apis=True)
+  endpoints = {}
+  await crawler.record_listing_response(
+      mock_listing_response("https://example.com/api/list?page=1",
+                            {"items": [{
+                                "url": "/product/1"
+                            }]}), endpoints)
+
+  pages = [
+      {
+          "items": [{
+              "url": "/product/2"
+          }]
+      },
+      {
+          "items": [{
+              "url": "/product/3"
+          }]
+      },
+      {
+          "items": [{
+              "url": "/product/3"
+          }]
+      },
+  ]
+  requested_urls = []
+
+  def get(url, headers=None):
+    assert headers == {
+        "accept": "application/json",
+        "Cookie": "session=abc; region=in"
+    }
+    requested_urls.append(url)
+    response = MagicMock()
+    response.status = 200
+    response.json = AsyncMock(return_value=pages[len(requested_urls) - 1])
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=response)
+    context.__aexit__ = AsyncMock(return_value=False)
+    return context
+
+  crawler.context = Mock()
+  crawler.context.cookies = AsyncMock(return_value=[{
+      "name": "session",
+      "value": "abc"
+  }, {
+      "name": "region",
+      "value": "in"
+  }])
+  crawler.http_session = MagicMock()
+  crawler.http_session.get.side_effect = get
+  new_products = await crawler.replay_listing_apis(endpoints)
+
+  # Paging stops at the first page that adds no new product URLs
+  assert requested_urls == [
+      "https://example.com/api/list?page=2",
+      "https://example.com/api/list?page=3",
+      "https://example.com/api/list?page=4"
+  ]
+  assert crawler.product_urls == {
+      "https://example.com/product/1", "https://example.com/product/2",
+      "https://example.com/product/3"
+  }
+  assert new_products == 2
+
+
+def test_should_skip_template():
+  crawler = Crawler("example.com", learn_url_templates=True)
+  for i in range(crawler.template_model.min_samples):
+    crawler.template_model.record(f"https://example.com/stores/{i}", 0, 0)
+    crawler.template_model.record(f"https://example.com/?ref={i}", 0, 0)
+
+  assert crawler.should_skip_template("https://example.com/stores/99")
+  assert not crawler.should_skip_template("https://example.com/category/1")
+  # The base URL is never skipped
+  assert crawler.template_model.should_skip(crawler.base_url + "/?ref=1")
+  assert not crawler.should_skip_template(crawler.base_url)
+
+
+@pytest.mark.asyncio
+async def test_dequeue_and_visit_with_learned_templates():
+  crawler = Crawler("example.com", learn_url_templates=True)
+  for i in range(crawler.template_model.min_samples):
+    crawler.template_model.record(f"https://example.com/stores/{i}", 0, 0)
+  crawler.template_model.record("https://example.com/category/1", 5, 5)
+  crawler.template_model.record("https://example.com/account/settings", 0, 1)
+
+  mock_extract = AsyncMock(return_value=[
+      "https://example.com/account/settings", "https://example.com/category/2"
+  ])
+  with patch.object(crawler, 'extract_urls', mock_extract):
+    await crawler.enqueue_url("https://example.com/stores/99")
+    await crawler.dequeue_and_visit()
+    assert not mock_extract.called
+
+    await crawler.enqueue_url("https://example.com/category/1")
+    await crawler.dequeue_and_visit()
+    assert mock_extract.called
+    # Links of more productive templates are queued first
+    assert crawler.crawl_queue.get_nowait()[-1] == (
+        "https://example.com/category/2")
+
+
+@pytest.mark.asyncio
+async def test_crawler_saves_template_model(tmp_path):
+  path = str(tmp_path / "example.com.json")
+  crawler = Crawler("example.com",
+                    learn_url_templates=True,
+                    template_model_path=path)
+  crawler.context = Mock()
+  crawler.template_model.record("https://example.com/category/1", 1, 1)
+  crawler.template_model.record("https://example.com/category/2", 1, 1)
+
+  with patch.object(crawler, 'extract_urls', AsyncMock(return_value=[])):
+    await crawler.crawl()
+
+  reloaded = Crawler("example.com",
+                     learn_url_templates=True,
+                     template_model_path=path,
+                     template_min_samples=2)
+  assert reloaded.template_model.min_samples == 2
+  assert reloaded.template_model.templates == {
+      "/category/{num}": {
+          "samples": 1,
+          "products": 1,
+          "new_links": 1
+      }
+  }
+
+
+@pytest.mark.asyncio
+async def test_extract_urls_keeps_listing_apis_per_page():
+  crawler = Crawler("example.com", intercept_listing_apis=True)
+  handlers = {}
+
+  def new_page(url, payload):
+    page = AsyncMock()
+    page.on = Mock(
+        side_effect=lambda event, handler: handlers.update({url: handler}))
+
+    async def goto(*args, **kwargs):
+      if payload:
+        handlers[url](mock_listing_response(
+            "https://example.com/api/list?page=1", payload))
+        await asyncio.sleep(0.01)
+
+    page.goto = goto
+    page.eval_on_selector_all.return_value = []
+    page.evaluate.side_effect = [100, None, 100]
+    return page
+
+  listing_page = new_page("https://example.com/men",
+                          {"items": [{
+                              "url": "/product/1"
+                          }]})
+  editorial_page = new_page("https://example.com/stories", None)
+  crawler.context = Mock()
+  crawler.replay_listing_apis = AsyncMock(return_value=0)
+
+  crawler.context.new_page = AsyncMock(return_value=listing_page)
+  await crawler.extract_urls("https://example.com/men")
+  # The listing page stops scrolling and replays its own endpoint
+  assert listing_page.evaluate.await_count == 0
+  replayed = crawler.replay_listing_apis.await_args.args[0]
+  assert len(replayed) == 1
+
+  crawler.context.new_page = AsyncMock(return_value=editorial_page)
+  await crawler.extract_urls("https://example.com/stories")
+  # A page without listing APIs keeps scrolling and replays nothing
+  assert editorial_page.evaluate.await_count == 3
+  assert crawler.replay_listing_apis.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_extract_urls_credits_listing_api_products_to_template():
+  crawler = Crawler("example.com",
+                    intercept_listing_apis=True,
+                    learn_url_templates=True)
+  handlers = []
+  page = AsyncMock()
+  page.on = Mock(side_effect=lambda event, handler: handlers.append(handler))
+
+  async def goto(*args, **kwargs):
+    handlers[0](mock_listing_response(
+        "https://example.com/api/list?page=1",
+        {"items": [{
+            "url": "/product/1"
+        }, {
+            "url": "/product/2"
+        }]}))
+    await asyncio.sleep(0.01)
+
+  page.goto = goto
+  # The rendered grid repeats the products already seen in the API response
+  page.eval_on_selector_all.return_value = [
+      "https://example.com/product/1", "https://example.com/product/2"
+  ]
+  crawler.context = Mock()
+  crawler.context.new_page = AsyncMock(return_value=page)
+  crawler.replay_listing_apis = AsyncMock(return_value=0)
+
+  await crawler.extract_urls("https://example.com/category/1")
+
+  assert crawler.template_model.templates["/category/{num}"]["products"] == 2
+
+
+@pytest.mark.asyncio
+async def test_extract_urls_keeps_scrolling_past_small_listing_api():
+  crawler = Crawler("example.com", intercept_listing_apis=True)
+  handlers = []
+  page = AsyncMock()
+  page.on = Mock(side_effect=lambda event, handler: handlers.append(handler))
+
+  async def goto(*args, **kwargs):
+    # A recommendations widget returns far fewer products than the grid
+    handlers[0](mock_listing_response(
+        "https://example.com/api/recommendations?page=1",
+        {"items": [{
+            "url": "/product/1"
+        }]}))
+    await asyncio.sleep(0.01)
+
+  page.goto = goto
+  page.eval_on_selector_all.return_value = [
+      f"https://example.com/product/{i}" for i in range(10)
+  ]
+  page.evaluate.side_effect = [100, None, 100]
+  crawler.context = Mock()
+  crawler.context.new_page = AsyncMock(return_value=page)
+  crawler.replay_listing_apis = AsyncMock(return_value=0)
+
+  await crawler.extract_urls("https://example.com/men")
+
+  assert page.evaluate.await_count == 3
+  crawler.replay_listing_apis.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_extract_urls_waits_for_listing_responses_before_close():
+  crawler = Crawler("example.com", intercept_listing_apis=True)
+  handlers = []
+  network_idle = asyncio.Event()
+  page = AsyncMock()
+  page.on = Mock(side_effect=lambda event, handler: handlers.append(handler))
+  response = mock_listing_response("https://example.com/api/list?page=1",
+                                   {"items": [{
+                                       "url": "/product/1"
+                                   }]})
+
+  async def slow_json():
+    await network_idle.wait()
+    return {"items": [{"url": "/product/1"}]}
+
+  response.json = slow_json
+
+  async def goto(*args, **kwargs):
+    handlers[0](response)
+
+  async def wait_for_load_state(*args, **kwargs):
+    network_idle.set()
+
+  products_at_close = []
+  page.goto = goto
+  page.wait_for_load_state = wait_for_load_state
+  page.close = AsyncMock(
+      side_effect=lambda: products_at_close.extend(crawler.product_urls))
+  page.eval_on_selector_all.return_value = []
+  page.evaluate.side_effect = [100, None, 100]
+  crawler.context = Mock()
+  crawler.context.new_page = AsyncMock(return_value=page)
+  crawler.replay_listing_apis = AsyncMock(return_value=0)
+
+  await crawler.extract_urls("https://example.com/men")
+
+  assert products_at_close == ["https://example.com/product/1"]
+
+
+@pytest.mark.asyncio
+async def test_replay_listing_apis_survives_cookie_and_replay_errors():
+  crawler = Crawler("example.com", intercept_listing_apis=True)
+  endpoints = {}
+  await crawler.record_listing_response(
+      mock_listing_response("https://example.com/api/list?page=1",
+                            {"items": [{
+                                "url": "/product/1"
+                            }]}), endpoints)
+  await crawler.record_listing_response(
+      mock_listing_response("https://example.com/api/other?page=1",
+                            {"items": [{
+                                "url": "/product/9"
+                            }]}), endpoints)
+
+  def get(url, headers=None):
+    if "other" in url:
+      raise RuntimeError("connection reset")
+    assert "Cookie" not in headers
+    response = MagicMock()
+    response.status = 200
+    response.json = AsyncMock(return_value={"items": [{
+        "url": "/product/2"
+    }]} if url.endswith("page=2") else {})
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=response)
+    context.__aexit__ = AsyncMock(return_value=False)
+    return context
+
+  crawler.context = Mock()
+  crawler.context.cookies = AsyncMock(side_effect=RuntimeError("closed"))
+  crawler.http_session = MagicMock()
+  crawler.http_session.get.side_effect = get
+
+  assert await crawler.replay_listing_apis(endpoints) == 1
+  assert "https://example.com/product/2" in crawler.product_urls
+
+
+def test_crawler_starts_with_empty_model_for_corrupt_file(tmp_path):
+  path = tmp_path / "example.com.json"
+  path.write_text('{"min_samples": 5, "templates": [{"templ')
+
+  crawler = Crawler("example.com",
+                    learn_url_templates=True,
+                    template_model_path=str(path))
+  assert len(crawler.template_model.templates) == 0
+
+
+@pytest.mark.asyncio
+async def test_crawl_queue_prioritizes_productive_templates_across_pages():
+  crawler = Crawler("example.com", learn_url_templates=True)
+  assert isinstance(crawler.crawl_queue, asyncio.PriorityQueue)
+  crawler.template_model.record("https://example.com/category/1", 5, 5)
+  crawler.template_model.record("https://example.com/stores/1", 0, 1)
+
+  # Links found on an earlier page do not jump ahead of better ones found later
+  await crawler.enqueue_url("https://example.com/stores/2")
+  await crawler.enqueue_url("https://example.com/stores/3")
+  await crawler.enqueue_url("https://example.com/category/2")
+
+  order = [crawler.crawl_queue.get_nowait()[-1] for _ in range(3)]
+  assert order == [
+      "https://example.com/category/2", "https://example.com/stores/2",
+      "https://example.com/stores/3"
+  ]
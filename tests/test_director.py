@@ -68,6 +68,33 @@ async def test_execute_crawler_with_error(director):
     error_crawler.close_browser.assert_called_once()
 
 
+@pytest.mark.parametrize("template_model_dir,domain,expected", [
+    (None, "example.com", None),
+    ("models", "example.com", os.path.join("models", "example.com.json")),
+    ("models", "www.example.com", os.path.join("models", "example.com.json")),
+    ("models", "https://www.Example.com",
+     os.path.join("models", "example.com.json")),
+    ("models", "www2.hm.com/en_in",
+     os.path.join("models", "www2.hm.com_en_in.json")),
+])
+def test_template_model_path(template_model_dir, domain, expected):
+  director = CrawlDirector(template_model_dir=template_model_dir)
+  assert director.template_model_path(domain) == expected
+
+
+def test_template_min_samples_passed_to_crawler(mock_crawler, tmp_path):
+  director = CrawlDirector(template_model_dir=str(tmp_path),
+                           template_min_samples=3)
+
+  with patch('src.core.director.Crawler',
+             return_value=mock_crawler) as crawler_class:
+    director.execute_crawlers(["example.com"])
+
+  kwargs = crawler_class.call_args.kwargs
+  assert kwargs["learn_url_templates"] is True
+  assert kwargs["template_min_samples"] == 3
+
+
 def test_results_file_creation(director, mock_crawler, tmp_path):
   domain = "example.com"
   expected_urls = ["https://example.com/product/1"]
@@ -0,0 +1,192 @@
+import os
+import pytest
+from src.core.template_model import TemplateModel
+
+
+@pytest.fixture
+def model():
+  return TemplateModel(min_samples=3)
+
+
+def test_template_model_initialization():
+  model = TemplateModel()
+  assert model.min_samples == 5
+  assert model.min_new_links == 1.0
+  assert model.resample_every == 20
+  assert len(model.templates) == 0
+
+
+def test_record_groups_urls_by_template(model):
+  model.record("https://example.com/category/1", products=4, new_links=10)
+  model.record("https://example.com/category/2", products=2, new_links=0)
+
+  assert model.templates == {
+      "/category/{num}": {
+          "samples": 2,
+          "products": 6,
+          "new_links": 10
+      }
+  }
+
+
+def test_unproductive_template_is_skipped_after_min_samples(model):
+  for i in range(2):
+    model.record(f"https://example.com/stores/{i}", products=0, new_links=0)
+  assert not model.should_skip("https://example.com/stores/9")
+
+  model.record("https://example.com/stores/2", products=0, new_links=0)
+  assert model.should_skip("https://example.com/stores/9")
+  assert not model.should_skip("https://example.com/category/9")
+
+
+@pytest.mark.parametrize("products,new_links,expected", [
+    (0, 0, True),
+    (0, 2, True),
+    (0, 3, False),
+    (1, 0, False),
+])
+def test_is_unproductive(model, products, new_links, expected):
+  model.record("https://example.com/a/1", products, new_links)
+  for i in range(2, 4):
+    model.record(f"https://example.com/a/{i}", 0, 0)
+  assert model.is_unproductive("/a/{num}") == expected
+
+
+def test_score_prefers_unseen_then_productive_templates(model):
+  model.record("https://example.com/category/1", products=10, new_links=2)
+  model.record("https://example.com/account/orders", products=0, new_links=1)
+
+  urls = [
+      "https://example.com/account/orders", "https://example.com/category/2",
+      "https://example.com/new-in"
+  ]
+  assert sorted(urls, key=model.score, reverse=True) == [
+      "https://example.com/new-in", "https://example.com/category/2",
+      "https://example.com/account/orders"
+  ]
+
+
+def test_export(model):
+  model.record("https://example.com/category/1", products=1, new_links=0)
+  for i in range(3):
+    model.record(f"https://example.com/stores/{i}", products=0, new_links=0)
+    model.record(f"https://example.com/p/{i}", products=0, new_links=5)
+
+  assert model.export() == [
+      {
+          "template": "/category/{num}",
+          "samples": 1,
+          "products": 1,
+          "new_links": 0,
+          "status": "learning"
+      },
+      {
+          "template": "/p/{num}",
+          "samples": 3,
+          "products": 0,
+          "new_links": 15,
+          "status": "productive"
+      },
+      {
+          "template": "/stores/{num}",
+          "samples": 3,
+          "products": 0,
+          "new_links": 0,
+          "status": "skipped"
+      },
+  ]
+
+
+def test_save_and_load(model, tmp_path):
+  path = str(tmp_path / "models" / "example.com.json")
+  for i in range(3):
+    model.record(f"https://example.com/stores/{i}", products=0, new_links=0)
+  model.save(path)
+
+  loaded = TemplateModel.load(path, min_samples=3, decay=1.0)
+  assert loaded.min_samples == 3
+  assert loaded.templates == model.templates
+  assert loaded.should_skip("https://example.com/stores/7")
+
+
+def test_load_reads_saved_settings(tmp_path):
+  path = str(tmp_path / "example.com.json")
+  TemplateModel(min_samples=3, min_new_links=2.0).save(path)
+
+  loaded = TemplateModel.load(path)
+  assert loaded.min_samples == 3
+  assert loaded.min_new_links == 2.0
+
+  # Explicit settings take precedence over the saved ones
+  overridden = TemplateModel.load(path, min_samples=8)
+  assert overridden.min_samples == 8
+  assert overridden.min_new_links == 2.0
+
+
+def test_load_without_path():
+  assert TemplateModel.load(None).min_samples == 5
+  assert TemplateModel.load(None, min_samples=2).min_samples == 2
+
+
+def test_load_decays_counters(model, tmp_path):
+  path = str(tmp_path / "example.com.json")
+  for i in range(4):
+    model.record(f"https://example.com/stores/{i}", products=0, new_links=0)
+  model.record("https://example.com/category/1", products=1, new_links=3)
+  model.save(path)
+
+  loaded = TemplateModel.load(path, min_samples=3)
+  assert loaded.templates == {
+      "/stores/{num}": {
+          "samples": 2,
+          "products": 0,
+          "new_links": 0
+      }
+  }
+  # A template skipped in an earlier run has to be sampled again
+  assert not loaded.should_skip("https://example.com/stores/7")
+
+
+def test_skipped_template_is_resampled():
+  model = TemplateModel(min_samples=1, resample_every=3)
+  model.record("https://example.com/stores/1", products=0, new_links=0)
+
+  decisions = [
+      model.should_skip(f"https://example.com/stores/{i}")
+      for i in range(2, 8)
+  ]
+  assert decisions == [True, True, False, True, True, False]
+
+  # A productive re-sample brings the template back
+  model.record("https://example.com/stores/4", products=2, new_links=0)
+  assert not model.should_skip("https://example.com/stores/9")
+
+
+def test_load_missing_file(tmp_path):
+  model = TemplateModel.load(str(tmp_path / "missing.json"), min_samples=7)
+  assert len(model.templates) == 0
+  assert model.min_samples == 7
+
+
+@pytest.mark.parametrize("content", [
+    '{"templates": [{"template": "/stores/{num}", "samp',
+    '{"templates": [{"template": "/stores/{num}"}]}',
+    '["not", "a", "model"]',
+])
+def test_load_corrupt_file(tmp_path, content):
+  path = tmp_path / "example.com.json"
+  path.write_text(content)
+
+  model = TemplateModel.load(str(path), min_samples=3)
+  assert len(model.templates) == 0
+  assert model.min_samples == 3
+
+
+def test_save_replaces_file_atomically(model, tmp_path):
+  path = tmp_path / "example.com.json"
+  path.write_text('{"templates": [')
+  model.record("https://example.com/category/1", products=1, new_links=1)
+  model.save(str(path))
+
+  assert os.listdir(tmp_path) == ["example.com.json"]
+  assert TemplateModel.load(str(path), decay=1.0).templates == model.templates
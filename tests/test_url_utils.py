@@ -1,7 +1,7 @@
 import pytest
 from src.utils.url_utils import (normalize_domain, normalize_url,
                                  is_out_of_domain, is_product_url,
-                                 is_ignore_url)
+                                 is_ignore_url, url_template)
 
 
 @pytest.mark.parametrize("input_domain,expected", [
@@ -78,6 +78,23 @@ def test_is_ignore_url(url, expected):
   assert is_ignore_url(url) == expected
 
 
+@pytest.mark.parametrize("url,expected", [
+    ("https://example.com", "/"),
+    ("https://example.com/store-locator", "/store-locator"),
+    ("https://example.com/men/shoes/", "/men/shoes"),
+    ("https://example.com/category/42", "/category/{num}"),
+    ("https://example.com/dp/B00EXAMPLE", "/dp/{id}"),
+    ("https://example.com/o/550e8400-e29b-41d4-a716-446655440000", "/o/{id}"),
+    ("https://example.com/shoes/nike-air-max-90", "/shoes/{slug}"),
+    ("https://example.com/category/item-p12345.html", "/category/{slug}"),
+    ("https://example.com/productpage.12345.html", "/{slug}"),
+    ("https://example.com/search?sort=asc&q=shoes&q=boots", "/search?q&sort"),
+    ("HTTPS://EXAMPLE.COM/Category/42", "/category/{num}"),
+])
+def test_url_template(url, expected):
+  assert url_template(url) == expected
+
+
 def test_normalize_domain_empty():
   assert normalize_domain("") == ""
 